@@ -1,14 +1,23 @@
 """CLI tool to embed images into Markdown as data URIs."""
 
 import argparse
-import base64
+import functools
 import io
+import math
+import os
 import re
+import struct
 import sys
+from collections.abc import Iterator
 from pathlib import Path
+from typing import AnyStr
 from urllib.parse import quote
 
-from PIL import Image
+try:
+    # SIMD-accelerated drop-in replacement, see the "fast" extra
+    import pybase64 as base64
+except ImportError:
+    import base64
 
 
 MIME_TYPES = {
@@ -19,162 +28,418 @@ MIME_TYPES = {
     ".svg": "image/svg+xml",
 }
 
+# Resampling filters selectable via --resample (Image.Resampling names)
+RESAMPLE_FILTERS = ("lanczos", "bicubic", "bilinear", "hamming")
 
-def wrap_base64(encoded: str, width: int = 80) -> str:
+# Downscale ratio above which the default filter switches to HAMMING
+LARGE_DOWNSCALE_RATIO = 4
+
+# Re-encoding defaults for scaled images: favour speed, the size delta is
+# small next to the base64 overhead (Pillow defaults: PNG 6, JPEG 75)
+DEFAULT_COMPRESS_LEVEL = 1
+DEFAULT_JPEG_QUALITY = 85
+
+# Line width produced by base64.encodebytes() (RFC 2045)
+MIME_LINE_WIDTH = 76
+
+# Header signatures used to read dimensions without Pillow
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+# Characters left unescaped in SVG data URIs (RFC 2397 / RFC 3986 reserved
+# characters that are harmless in a Markdown link destination). Parentheses,
+# whitespace, "#", "%", "&" (CommonMark decodes entities in destinations) and
+# non-ASCII are still percent-encoded.
+SVG_SAFE_CHARS = "/:;=,!$'*+?@\""
+
+# Chunk size for reading files whose size is unknown up front
+READ_CHUNK_SIZE = 64 * 1024
+
+# Raw bytes per streamed base64 block (a multiple of 3 encodes without padding)
+BASE64_BLOCK_SIZE = 3 * 64 * 1024
+
+# SVG attribute patterns, compiled once at import
+_SVG_SIZE_RE = re.compile(
+    rb'width=["\'](?P<w>\d+(?:\.\d+)?)'
+    rb'|viewBox=["\'][\d.]+\s+[\d.]+\s+(?P<vbw>[\d.]+)\s+(?P<vbh>[\d.]+)["\']'
+)
+_WIDTH_ATTR_RE = re.compile(rb'width=["\']([\d.]+)["\']')
+_HEIGHT_ATTR_RE = re.compile(rb'height=["\']([\d.]+)["\']')
+_SIZE_ATTRS_RE = re.compile(rb'\s+(?:width|height)=["\'][\d.]+["\']')
+_SVG_TAG_RE = re.compile(rb"<svg\b([^>]*)>", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=8)
+def _line_pattern(width: int, binary: bool) -> re.Pattern:
+    """Compile (once per width) a pattern matching one output line.
+
+    Args:
+        width: Max characters per line
+        binary: Compile a bytes pattern instead of a str pattern
+
+    Returns:
+        Compiled pattern
+    """
+    pattern = f".{{1,{width}}}"
+    return re.compile(pattern.encode() if binary else pattern, re.DOTALL)
+
+
+def wrap_base64(encoded: AnyStr, width: int = 80) -> AnyStr:
     """Wrap base64 string into multiple lines.
 
     Args:
-        encoded: Base64-encoded string
+        encoded: Base64-encoded string or bytes
         width: Max characters per line
 
     Returns:
-        Wrapped string with newlines
+        Wrapped string (or bytes) with newlines
+    """
+    if len(encoded) <= width:
+        return encoded
+
+    # findall() splits into lines in C, no Python-level slicing loop
+    if isinstance(encoded, bytes):
+        return b"\n".join(_line_pattern(width, binary=True).findall(encoded))
+    return "\n".join(_line_pattern(width, binary=False).findall(encoded))
+
+
+def _read_file_fast(path: Path) -> bytes:
+    """Read a whole file with as few syscalls as possible.
+
+    Sizes the read from fstat() and bypasses Python's buffered I/O, so a
+    regular file is usually read with a single os.read() call.
+
+    Args:
+        path: File to read
+
+    Returns:
+        File contents
+    """
+    # O_BINARY (Windows only) avoids CRLF translation and Ctrl-Z as EOF
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        size = os.fstat(fd).st_size
+        data = os.read(fd, size) if size else b""
+        if size == 0 or len(data) < size:
+            # Short read (file > 2 GiB on Linux) or no usable size (FIFO,
+            # procfs); read the remainder until EOF
+            chunks = [data]
+            received = len(data)
+            while chunk := os.read(fd, max(size - received, 0) or READ_CHUNK_SIZE):
+                chunks.append(chunk)
+                received += len(chunk)
+            data = b"".join(chunks)
+        return data
+    finally:
+        os.close(fd)
+
+
+def _parse_svg_width(
+    svg_content: bytes,
+) -> tuple[int | None, re.Match[bytes] | None]:
+    """Extract width and viewBox from SVG content in one go.
+
+    Args:
+        svg_content: SVG markup (UTF-8 bytes)
+
+    Returns:
+        Tuple of (width in pixels or None, viewBox match or None)
     """
-    lines = [encoded[i : i + width] for i in range(0, len(encoded), width)]
-    return "\n".join(lines)
+    # Single scan for both attributes; stop once each has been seen
+    width_match = viewbox_match = None
+    for match in _SVG_SIZE_RE.finditer(svg_content):
+        if match["w"] is not None:
+            width_match = width_match or match
+        else:
+            viewbox_match = viewbox_match or match
+        if width_match and viewbox_match:
+            break
+
+    # Prefer explicit width attribute, then viewBox
+    if width_match:
+        return int(float(width_match["w"])), viewbox_match
+    if viewbox_match:
+        return int(float(viewbox_match["vbw"])), viewbox_match
 
+    return None, viewbox_match
 
-def get_svg_width(svg_content: str) -> int | None:
+
+def get_svg_width(svg_content: bytes) -> int | None:
     """Extract width from SVG content.
 
     Args:
-        svg_content: SVG markup
+        svg_content: SVG markup (UTF-8 bytes)
 
     Returns:
         Width in pixels, or None if not determinable
     """
-    # Try explicit width attribute
-    width_match = re.search(r'width=["\'](\d+(?:\.\d+)?)', svg_content)
-    if width_match:
-        return int(float(width_match.group(1)))
+    return _parse_svg_width(svg_content)[0]
 
-    # Try viewBox
-    viewbox_match = re.search(
-        r'viewBox=["\']([\d.]+)\s+([\d.]+)\s+([\d.]+)\s+([\d.]+)["\']', svg_content
-    )
-    if viewbox_match:
-        return int(float(viewbox_match.group(3)))
 
-    return None
+def _rewrite_svg_attrs(attrs: bytes, width: int, height: int) -> bytes:
+    """Build an opening <svg> tag with width/height replaced.
 
+    Args:
+        attrs: Attribute text of the original opening tag
+        width: New width in pixels
+        height: New height in pixels
+
+    Returns:
+        Rewritten opening tag
+    """
+    attrs = _SIZE_ATTRS_RE.sub(b"", attrs)
+    return b'<svg%b width="%d" height="%d">' % (attrs, width, height)
 
-def scale_svg(svg_content: str, max_width: int) -> tuple[str, bool]:
+
+def scale_svg(svg_content: bytes, max_width: int) -> tuple[bytes, bool, int | None]:
     """Inject width/height attributes into SVG to scale it.
 
     Args:
-        svg_content: Original SVG markup
+        svg_content: Original SVG markup (UTF-8 bytes)
         max_width: Target width in pixels
 
     Returns:
-        Tuple of (modified SVG, upscaling_attempted)
+        Tuple of (modified SVG, upscaling_attempted, original width)
     """
-    # Detect original width
-    orig_width = get_svg_width(svg_content)
+    # Detect original width; the viewBox match is reused for the aspect ratio
+    orig_width, viewbox_match = _parse_svg_width(svg_content)
     upscaling = False
 
     if orig_width and max_width > orig_width:
         upscaling = True
         # Don't scale, return original
-        return svg_content, upscaling
-
-    # Parse viewBox to get aspect ratio
-    viewbox_match = re.search(
-        r'viewBox=["\']([\d.]+)\s+([\d.]+)\s+([\d.]+)\s+([\d.]+)["\']', svg_content
-    )
+        return svg_content, upscaling, orig_width
 
+    # Use viewBox to get aspect ratio
     if viewbox_match:
-        vb_width = float(viewbox_match.group(3))
-        vb_height = float(viewbox_match.group(4))
+        vb_width = float(viewbox_match["vbw"])
+        vb_height = float(viewbox_match["vbh"])
         aspect_ratio = vb_height / vb_width
         target_height = int(max_width * aspect_ratio)
     else:
         # No viewBox; try to extract width/height
-        width_match = re.search(r'width=["\']([\d.]+)["\']', svg_content)
-        height_match = re.search(r'height=["\']([\d.]+)["\']', svg_content)
+        width_match = _WIDTH_ATTR_RE.search(svg_content)
+        height_match = _HEIGHT_ATTR_RE.search(svg_content)
 
         if width_match and height_match:
-            orig_width = float(width_match.group(1))
-            orig_height = float(height_match.group(1))
-            aspect_ratio = orig_height / orig_width
+            attr_width = float(width_match.group(1))
+            attr_height = float(height_match.group(1))
+            aspect_ratio = attr_height / attr_width
             target_height = int(max_width * aspect_ratio)
         else:
             # Fallback: square aspect ratio
             target_height = max_width
 
-    # Inject or replace width/height in opening <svg> tag
-    svg_content = re.sub(r'(<svg[^>]*)\s+width=["\'][\d.]+["\']', r"\1", svg_content)
-    svg_content = re.sub(r'(<svg[^>]*)\s+height=["\'][\d.]+["\']', r"\1", svg_content)
-    svg_content = re.sub(
-        r"(<svg[^>]*)(>)",
-        rf'\1 width="{max_width}" height="{target_height}"\2',
+    # Inject or replace width/height in opening <svg> tag (single pass)
+    svg_content = _SVG_TAG_RE.sub(
+        lambda m: _rewrite_svg_attrs(m.group(1), max_width, target_height),
         svg_content,
         count=1,
     )
 
-    return svg_content, upscaling
+    return svg_content, upscaling, orig_width
 
 
-def scale_raster(img_bytes: bytes, max_width: int, mime: str) -> tuple[bytes, bool]:
+def _peek_dimensions(img_bytes: bytes, mime: str) -> tuple[int, int] | None:
+    """Read image dimensions from the PNG/JPEG/GIF header.
+
+    Args:
+        img_bytes: Image bytes
+        mime: MIME type of the image
+
+    Returns:
+        Tuple of (width, height), or None if the header is not recognized
+    """
+    if mime == "image/png":
+        # Signature, then the IHDR chunk: length, type, width, height
+        if (
+            len(img_bytes) >= 24
+            and img_bytes[:8] == PNG_SIGNATURE
+            and img_bytes[12:16] == b"IHDR"
+        ):
+            width, height = struct.unpack(">II", img_bytes[16:24])
+            return width, height
+    elif mime == "image/gif":
+        # Logical screen descriptor follows the 6-byte signature
+        if img_bytes[:6] in (b"GIF87a", b"GIF89a") and len(img_bytes) >= 10:
+            width, height = struct.unpack("<HH", img_bytes[6:10])
+            return width, height
+    elif mime == "image/jpeg" and img_bytes[:2] == b"\xff\xd8":
+        # Walk marker segments up to the first start-of-frame
+        pos = 2
+        while pos + 4 <= len(img_bytes):
+            if img_bytes[pos] != 0xFF:
+                return None
+            marker = img_bytes[pos + 1]
+            if marker == 0xFF:
+                # Fill byte
+                pos += 1
+                continue
+            if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+                # Standalone marker without a length field
+                pos += 2
+                continue
+            if marker in JPEG_SOF_MARKERS:
+                if pos + 9 > len(img_bytes):
+                    return None
+                height, width = struct.unpack(">HH", img_bytes[pos + 5 : pos + 9])
+                return width, height
+            (length,) = struct.unpack(">H", img_bytes[pos + 2 : pos + 4])
+            pos += 2 + length
+
+    return None
+
+
+def scale_raster(
+    img_bytes: bytes,
+    max_width: int,
+    mime: str,
+    resample: str | None = None,
+    compress_level: int = DEFAULT_COMPRESS_LEVEL,
+    quality: int = DEFAULT_JPEG_QUALITY,
+) -> tuple[bytes, bool]:
     """Scale raster image (PNG/JPEG/GIF) using Pillow.
 
     Args:
         img_bytes: Original image bytes
         max_width: Target width in pixels
         mime: MIME type for output format
+        resample: Resampling filter name (None = LANCZOS, or HAMMING for
+            large downscales)
+        compress_level: zlib compression level for PNG output (0-9)
+        quality: JPEG output quality (1-95)
 
     Returns:
         Tuple of (scaled image bytes, upscaling_attempted)
     """
-    img = Image.open(io.BytesIO(img_bytes))
+    # Header peek avoids importing Pillow when no resize is needed
+    size = _peek_dimensions(img_bytes, mime)
+    if size is None:
+        from PIL import Image
+
+        size = Image.open(io.BytesIO(img_bytes)).size
+    width = size[0]
 
     upscaling = False
 
     # Detect upscaling attempt
-    if img.width < max_width:
+    if width < max_width:
         upscaling = True
         print(
-            f"Warning: Image is {img.width}px wide but --max-width is {max_width}px. "
+            f"Warning: Image is {width}px wide but --max-width is {max_width}px. "
             f"Keeping original size to avoid upscaling.",
             file=sys.stderr,
         )
         return img_bytes, upscaling
 
     # Skip if already exact size
-    if img.width == max_width:
+    if width == max_width:
         return img_bytes, upscaling
 
+    # Imported lazily: Pillow's C extensions add noticeable CLI startup time
+    from PIL import Image
+
+    img = Image.open(io.BytesIO(img_bytes))
+
     # Calculate new dimensions preserving aspect ratio
     aspect_ratio = img.height / img.width
     new_height = int(max_width * aspect_ratio)
 
-    # Resize with high-quality resampling
-    img_resized = img.resize((max_width, new_height), Image.Resampling.LANCZOS)
+    # Pick resampling filter; HAMMING is much cheaper for large downscales
+    if resample is None:
+        if img.width / max_width > LARGE_DOWNSCALE_RATIO:
+            resample = "hamming"
+        else:
+            resample = "lanczos"
+    resample_filter = Image.Resampling[resample.upper()]
+
+    # Let libjpeg scale down in the DCT domain while decoding: pick the
+    # largest power-of-two factor (up to 1/8) that keeps at least the target
+    # width, so the full-resolution pixel buffer is never allocated
+    if mime == "image/jpeg":
+        scale = 1 << max(0, min(3, int(math.log2(img.width / max_width))))
+        img.draft("RGB", (max(img.width // scale, 1), max(img.height // scale, 1)))
+
+    img_resized = img.resize((max_width, new_height), resample_filter)
 
-    # Encode back to bytes
+    # Release the decoded source pixels before the encoder allocates its output
+    img.close()
+
+    # Encode back to bytes; getvalue() hands over the buffer without copying
     output = io.BytesIO()
     format_map = {"image/png": "PNG", "image/jpeg": "JPEG", "image/gif": "GIF"}
     img_format = format_map.get(mime, "PNG")
-    img_resized.save(output, format=img_format)
+    save_options: dict[str, int | bool] = {}
+    if img_format == "PNG":
+        save_options["compress_level"] = compress_level
+    elif img_format == "JPEG":
+        save_options.update(quality=quality, optimize=False, progressive=False)
+    img_resized.save(output, format=img_format, **save_options)
 
     return output.getvalue(), upscaling
 
 
-def embed_image(
+def _iter_base64(data: bytes, wrap_width: int | None) -> Iterator[bytes]:
+    """Base64-encode data in fixed-size blocks.
+
+    Blocks are sized so each encodes to whole lines, which lets them be
+    encoded (and wrapped) independently and written out as they go.
+
+    Args:
+        data: Raw bytes to encode
+        wrap_width: Wrap output at width chars (None = no wrap)
+
+    Yields:
+        Base64-encoded (and wrapped) chunks
+    """
+    if wrap_width is None:
+        block_size = BASE64_BLOCK_SIZE
+    else:
+        # Smallest raw length that encodes to a whole number of lines
+        line_group = math.lcm(4, wrap_width) // 4 * 3
+        block_size = max(1, BASE64_BLOCK_SIZE // line_group) * line_group
+
+    view = memoryview(data)
+    for start in range(0, len(data), block_size):
+        block = view[start : start + block_size]
+        if wrap_width is None:
+            yield base64.b64encode(block)
+            continue
+
+        if start:
+            yield b"\n"
+        if wrap_width == MIME_LINE_WIDTH:
+            # encodebytes() wraps at the MIME line width in a single C call
+            yield base64.encodebytes(block)[:-1]
+        else:
+            yield wrap_base64(base64.b64encode(block), wrap_width)
+
+
+def iter_embed_image(
     path: Path,
     alt_text: str | None = None,
     max_width: int | None = None,
     wrap_width: int | None = None,
-) -> str:
-    """Convert image file to data URI markdown line.
+    resample: str | None = None,
+    compress_level: int = DEFAULT_COMPRESS_LEVEL,
+    quality: int = DEFAULT_JPEG_QUALITY,
+) -> Iterator[bytes]:
+    """Convert image file to data URI markdown line, in encoded chunks.
+
+    The file is read and scaled before the first chunk is produced, so
+    errors are raised before any output is yielded.
 
     Args:
         path: Path to image file
         alt_text: Optional alt text; defaults to filename stem
         max_width: Optional max width in pixels (scales image)
         wrap_width: Wrap base64 output at width chars (None = no wrap)
+        resample: Resampling filter for raster scaling (None = automatic)
+        compress_level: zlib level for re-encoded PNGs (0-9)
+        quality: Quality for re-encoded JPEGs (1-95)
 
-    Returns:
-        Markdown image line with embedded data URI
+    Yields:
+        UTF-8 encoded pieces of the markdown image line
     """
     if not path.exists():
         raise FileNotFoundError(f"File not found: {path}")
@@ -188,40 +453,64 @@ def embed_image(
     alt = alt_text or path.stem
 
     if suffix == ".svg":
-        # SVG: URL-encode
-        svg_content = path.read_text(encoding="utf-8")
+        # SVG: URL-encode; kept as bytes throughout, quote() takes them as-is
+        svg_content = _read_file_fast(path)
 
         # Scale if requested
         if max_width:
-            svg_content, upscaling = scale_svg(svg_content, max_width)
+            svg_content, upscaling, orig_width = scale_svg(svg_content, max_width)
             if upscaling:
-                orig_width = get_svg_width(path.read_text(encoding="utf-8"))
                 print(
                     f"Warning: SVG is {orig_width}px wide but --max-width is {max_width}px. "
                     f"Keeping original size to avoid upscaling.",
                     file=sys.stderr,
                 )
 
-        encoded = quote(svg_content)
-        data_uri = f"data:{mime},{encoded}"
+        encoded = quote(svg_content, safe=SVG_SAFE_CHARS)
+        yield f"![{alt}](data:{mime},{encoded})".encode()
     else:
         # PNG/JPEG/GIF: base64
-        img_bytes = path.read_bytes()
+        img_bytes = _read_file_fast(path)
 
         # Scale if requested
         if max_width:
-            img_bytes, _ = scale_raster(img_bytes, max_width, mime)
+            img_bytes, _ = scale_raster(
+                img_bytes, max_width, mime, resample, compress_level, quality
+            )
             # Warning already printed in scale_raster()
 
-        encoded = base64.b64encode(img_bytes).decode("ascii")
+        yield f"![{alt}](data:{mime};base64,".encode()
+        yield from _iter_base64(img_bytes, wrap_width)
+        yield b")"
 
-        # Wrap base64 output
-        if wrap_width is not None:
-            encoded = wrap_base64(encoded, wrap_width)
 
-        data_uri = f"data:{mime};base64,{encoded}"
+def embed_image(
+    path: Path,
+    alt_text: str | None = None,
+    max_width: int | None = None,
+    wrap_width: int | None = None,
+    resample: str | None = None,
+    compress_level: int = DEFAULT_COMPRESS_LEVEL,
+    quality: int = DEFAULT_JPEG_QUALITY,
+) -> str:
+    """Convert image file to data URI markdown line.
+
+    Args:
+        path: Path to image file
+        alt_text: Optional alt text; defaults to filename stem
+        max_width: Optional max width in pixels (scales image)
+        wrap_width: Wrap base64 output at width chars (None = no wrap)
+        resample: Resampling filter for raster scaling (None = automatic)
+        compress_level: zlib level for re-encoded PNGs (0-9)
+        quality: Quality for re-encoded JPEGs (1-95)
 
-    return f"![{alt}]({data_uri})"
+    Returns:
+        Markdown image line with embedded data URI
+    """
+    chunks = iter_embed_image(
+        path, alt_text, max_width, wrap_width, resample, compress_level, quality
+    )
+    return b"".join(chunks).decode("utf-8")
 
 
 def main() -> None:
@@ -245,6 +534,25 @@ def main() -> None:
         metavar="WIDTH",
         help="Wrap base64 at WIDTH chars (default 80 when flag used, min 40)",
     )
+    parser.add_argument(
+        "--resample",
+        choices=RESAMPLE_FILTERS,
+        help="Raster resampling filter (default: lanczos, hamming for large downscales)",
+    )
+    parser.add_argument(
+        "--compress-level",
+        type=int,
+        default=DEFAULT_COMPRESS_LEVEL,
+        dest="compress_level",
+        metavar="LEVEL",
+        help=f"zlib level 0-9 for scaled PNGs (default {DEFAULT_COMPRESS_LEVEL})",
+    )
+    parser.add_argument(
+        "--quality",
+        type=int,
+        default=DEFAULT_JPEG_QUALITY,
+        help=f"Quality 1-95 for scaled JPEGs (default {DEFAULT_JPEG_QUALITY})",
+    )
 
     args = parser.parse_args()
 
@@ -252,14 +560,25 @@ def main() -> None:
     if args.wrap is not None and (args.wrap < 40 or args.wrap > sys.maxsize):
         parser.error("--wrap WIDTH must be between 40 and sys.maxsize")
 
+    # Validate re-encoding options
+    if not 0 <= args.compress_level <= 9:
+        parser.error("--compress-level must be between 0 and 9")
+    if not 1 <= args.quality <= 95:
+        parser.error("--quality must be between 1 and 95")
+
     try:
-        markdown = embed_image(
+        chunks = iter_embed_image(
             args.file,
             args.alt,
             max_width=args.max_width,
             wrap_width=args.wrap,
+            resample=args.resample,
+            compress_level=args.compress_level,
+            quality=args.quality,
         )
-        print(markdown)
+        # Bypass the text layer; writelines() drives the generator from C
+        sys.stdout.buffer.writelines(chunks)
+        sys.stdout.buffer.write(b"\n")
     except (FileNotFoundError, ValueError) as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
@@ -1,8 +1,14 @@
 """Integration tests for embed_image function."""
 
+import base64
+import os
+import subprocess
+import sys
+import threading
 from pathlib import Path
 import pytest
-from md_img_uri.cli import embed_image
+from PIL import Image
+from md_img_uri.cli import embed_image, main, wrap_base64
 
 
 def test_embed_png_no_wrap(small_png):
@@ -83,3 +89,89 @@ def test_embed_png_downscale(large_png):
     result = embed_image(large_png, max_width=100)
     assert "![large]" in result
     # Result should be smaller (can't easily verify without decoding)
+
+
+def test_embed_png_wrap_mime_width(large_png):
+    """Test wrapping at the MIME line width matches generic wrapping."""
+    result = embed_image(large_png, wrap_width=76)
+    data_uri = result.split("](")[1].rstrip(")")
+    encoded = data_uri.split(",", 1)[1]
+    lines = encoded.split("\n")
+    assert all(len(line) == 76 for line in lines[:-1])
+    assert 0 < len(lines[-1]) <= 76
+    assert wrap_base64(encoded.replace("\n", ""), 76) == encoded
+
+
+def test_embed_png_streamed_blocks(tmp_path):
+    """Test block-wise encoding matches encoding the whole file at once."""
+    # Noise does not compress, so the file spans several encoding blocks
+    img = Image.frombytes("RGB", (300, 300), os.urandom(300 * 300 * 3))
+    path = tmp_path / "noise.png"
+    img.save(path)
+    expected = base64.b64encode(path.read_bytes()).decode("ascii")
+
+    for wrap_width in (None, 41, 76, 80):
+        result = embed_image(path, wrap_width=wrap_width)
+        encoded = result.split("](data:image/png;base64,")[1].rstrip(")")
+        if wrap_width is None:
+            assert encoded == expected
+        else:
+            assert encoded == wrap_base64(expected, wrap_width)
+
+
+def test_embed_svg_escaping(tmp_path):
+    """Test SVG data URI keeps safe characters and escapes the rest."""
+    path = tmp_path / "escape.svg"
+    path.write_text(
+        '<svg xmlns="http://www.w3.org/2000/svg">'
+        '<rect fill="#f00" style="width: calc(100% - 1px)"/>ü'
+        "<text>a &lt; b &amp; c</text></svg>"
+    )
+    result = embed_image(path)
+    data_uri = result.split("](", 1)[1][:-1]
+    assert 'xmlns="http://www.w3.org/2000/svg"' in data_uri
+    assert "%23f00" in data_uri
+    assert "calc%28100%25%20-%201px%29" in data_uri
+    assert "%C3%BC" in data_uri
+    assert "a%20%26lt;%20b%20%26amp;%20c" in data_uri
+    assert not any(c in data_uri for c in " #&()<>")
+
+
+def test_main_writes_markdown_line(small_png, monkeypatch, capsysbinary):
+    """Test CLI output matches embed_image plus a trailing newline."""
+    monkeypatch.setattr("sys.argv", ["md-img-uri", str(small_png), "--wrap"])
+    main()
+    captured = capsysbinary.readouterr()
+    expected = embed_image(small_png, wrap_width=80)
+    assert captured.out == expected.encode("utf-8") + b"\n"
+
+
+def test_embed_without_scaling_skips_pillow(small_png):
+    """Test Pillow is not imported when no scaling is requested."""
+    code = (
+        "import sys\n"
+        "from pathlib import Path\n"
+        "from md_img_uri.cli import embed_image\n"
+        f"embed_image(Path({str(small_png)!r}))\n"
+        f"embed_image(Path({str(small_png)!r}), max_width=10)\n"
+        "assert 'PIL' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="requires os.mkfifo")
+def test_embed_svg_from_fifo(tmp_path):
+    """Test reading an SVG from a FIFO, which reports a size of 0."""
+    path = tmp_path / "pipe.svg"
+    os.mkfifo(path)
+    content = '<svg xmlns="http://www.w3.org/2000/svg" width="10"/>'
+
+    def feed():
+        with open(path, "w") as fifo:
+            fifo.write(content)
+
+    writer = threading.Thread(target=feed)
+    writer.start()
+    result = embed_image(path)
+    writer.join()
+    assert 'xmlns="http://www.w3.org/2000/svg"' in result
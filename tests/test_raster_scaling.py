@@ -2,7 +2,7 @@
 
 import io
 from PIL import Image
-from md_img_uri.cli import scale_raster
+from md_img_uri.cli import _peek_dimensions, scale_raster
 
 
 def test_scale_raster_downscale():
@@ -65,3 +65,79 @@ def test_scale_raster_jpeg():
     result_img = Image.open(io.BytesIO(result_bytes))
     assert result_img.width == 100
     assert result_img.height == 75
+
+
+def test_scale_raster_jpeg_large_downscale():
+    """Test large JPEG downscale via reduced-scale decoding."""
+    img = Image.new("RGB", (1600, 1200), color="purple")
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG")
+    img_bytes = buf.getvalue()
+
+    result_bytes, upscaling = scale_raster(img_bytes, 100, "image/jpeg")
+    assert not upscaling
+
+    result_img = Image.open(io.BytesIO(result_bytes))
+    assert result_img.format == "JPEG"
+    assert result_img.width == 100
+    assert result_img.height == 75
+
+
+def test_scale_raster_resample_filters():
+    """Test explicit and automatic resampling filter selection."""
+    img = Image.new("RGB", (1000, 500), color="orange")
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    img_bytes = buf.getvalue()
+
+    for resample in (None, "lanczos", "bicubic", "bilinear", "hamming"):
+        result_bytes, upscaling = scale_raster(img_bytes, 100, "image/png", resample)
+        assert not upscaling
+
+        result_img = Image.open(io.BytesIO(result_bytes))
+        assert result_img.width == 100
+        assert result_img.height == 50
+
+
+def test_peek_dimensions():
+    """Test reading dimensions from PNG/JPEG/GIF headers."""
+    for fmt, mime in (
+        ("PNG", "image/png"),
+        ("JPEG", "image/jpeg"),
+        ("GIF", "image/gif"),
+    ):
+        img = Image.new("RGB", (123, 45), color="white")
+        buf = io.BytesIO()
+        img.save(buf, format=fmt)
+        assert _peek_dimensions(buf.getvalue(), mime) == (123, 45)
+
+    assert _peek_dimensions(b"not an image", "image/png") is None
+    png = io.BytesIO()
+    Image.new("RGB", (5, 5)).save(png, format="PNG")
+    assert _peek_dimensions(png.getvalue()[:20], "image/png") is None
+    assert _peek_dimensions(b"\xff\xd8\xff", "image/jpeg") is None
+
+
+def test_scale_raster_gif_exact_size():
+    """Test exact size GIF returns original bytes."""
+    img = Image.new("RGB", (100, 40), color="white")
+    buf = io.BytesIO()
+    img.save(buf, format="GIF")
+    img_bytes = buf.getvalue()
+
+    result_bytes, upscaling = scale_raster(img_bytes, 100, "image/gif")
+    assert not upscaling
+    assert result_bytes == img_bytes
+
+
+def test_scale_raster_png_compress_level():
+    """Test PNG compression level is applied when re-encoding."""
+    img = Image.frombytes("L", (200, 100), bytes(range(200)) * 100)
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    img_bytes = buf.getvalue()
+
+    stored, _ = scale_raster(img_bytes, 100, "image/png", compress_level=0)
+    packed, _ = scale_raster(img_bytes, 100, "image/png", compress_level=9)
+    assert len(packed) < len(stored)
+    assert Image.open(io.BytesIO(stored)).size == (100, 50)
@@ -38,3 +38,17 @@ def test_wrap_exact():
     lines = result.split("\n")
     assert len(lines) == 1
     assert len(lines[0]) == 80
+
+
+def test_wrap_bytes():
+    """Test wrapping bytes input matches wrapping str input."""
+    encoded = "E" * 170
+    result = wrap_base64(encoded.encode("ascii"), 80)
+    assert isinstance(result, bytes)
+    assert result == wrap_base64(encoded, 80).encode("ascii")
+
+
+def test_wrap_wider_than_input():
+    """Test width beyond input length returns input unchanged."""
+    encoded = "F" * 50
+    assert wrap_base64(encoded, 2**62) == encoded